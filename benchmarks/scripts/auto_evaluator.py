@@ -6,11 +6,56 @@ Clones, parses, and updates the Live Benchmark Wall and History Archive.
 import os
 import shutil
 import subprocess
+import tempfile
+import threading
+import multiprocessing
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+from dataclasses import fields
 from datetime import datetime
+from typing import Iterator, Optional
 from src.trending_fetcher import get_trending_python_repos
-from src.parser import ASTParser
-from src.utils import get_all_python_files, read_file
-from benchmarks.scripts.update_global_metrics import count_loc_in_dir, update_metrics_json, update_readme_placeholders
+from src.parser import ASTParser, ChunkMetadata
+from src.utils import get_all_python_files
+from benchmarks.scripts.update_global_metrics import (
+    count_loc_in_bytes, load_metrics, save_metrics, update_metrics_json, update_readme_placeholders
+)
+from benchmarks.scripts.parse_cache import cached_parse
+
+# 克隆是网络密集型操作，多个仓库并行评估；README / metrics 的写入需串行
+EVAL_WORKERS = int(os.getenv("EVAL_WORKERS", "8"))
+# 仓库体积上限 (KB)，超过的仓库在克隆前即被跳过，避免单个巨型仓库拖垮整个周期
+MAX_REPO_KB = int(os.getenv("MAX_REPO_KB", "51200"))
+_writer_lock = threading.Lock()
+
+# 临时克隆目录的位置：默认放在内存盘 /dev/shm（克隆和清理都不落盘），不存在时使用系统临时目录
+EVAL_TMP = os.getenv("EVAL_TMP") or ("/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir())
+
+# 元数据字段名，直接读属性计数，避免每个分块构造字典
+_META_FIELDS = tuple(f.name for f in fields(ChunkMetadata))
+
+# 进程级共享的解析器：主进程和每个 spawn 出的解析子进程在导入本模块时各构造一次
+_PARSER = ASTParser()
+
+
+def _parse_one(f_path: str) -> tuple[int, int, int]:
+    """
+    在解析子进程中处理单个文件，只读取一次：同一份字节既用于统计代码行数，也交给解析器。
+    返回 (代码行数, 分块数, 非空元数据字段数)。
+    """
+    try:
+        with open(f_path, 'rb') as f:
+            source = f.read()
+    except Exception:
+        return 0, 0, 0
+
+    loc = count_loc_in_bytes(source)
+    try:
+        chunks = cached_parse(_PARSER, source, f_path)
+    except Exception:
+        return loc, 0, 0
+
+    meta_fields = sum(1 for c in chunks for f in _META_FIELDS if getattr(c.metadata, f) is not None)
+    return loc, len(chunks), meta_fields
 
 
 def log_to_conquered_history(name: str, loc: int, chunks: int):
@@ -35,125 +80,228 @@ def log_to_conquered_history(name: str, loc: int, chunks: int):
 
 
 def update_readme_wall(entry: str):
-    """更新 README.md 中的实时展示墙，仅保留最近的 15 条记录。"""
-    readme_path = "README.md"
-    if not os.path.exists(readme_path):
-        return
-
-    with open(readme_path, "r", encoding="utf-8") as f:
-        lines = f.readlines()
-
-    wall_header = "## Live Benchmark Wall"
-    wall_found = False
-    header_idx = -1
-
-    for i, line in enumerate(lines):
-        if wall_header in line:
-            wall_found = True
-            header_idx = i
-            break
-
-    if not wall_found:
-        lines.append(f"\n{wall_header}\n")
-        lines.append("| Time | Repository | Chunks | Syntax % | Meta Density |\n")
-        lines.append("| :--- | :--- | :---: | :---: | :---: |\n")
-        header_idx = len(lines) - 3
-
-    # 在表头下方插入新数据 (header_idx + 3 是第一行数据的位置)
-    lines.insert(header_idx + 3, entry + "\n")
-
-    # --- 自动截断逻辑：防止 README 爆炸 ---
-    # 查找表格结束的位置（通常是下一个标题或文件末尾）
-    table_start = header_idx + 3
-    table_end = table_start
-    for i in range(table_start, len(lines)):
-        if lines[i].startswith("##") or lines[i].strip() == "":
-            table_end = i
-            break
-        table_end = i + 1
-
-    # 如果数据行数超过 15 行，删除旧的（底部）记录
+    """更新实时展示墙 benchmarks/wall.md（README 中仅保留指向它的链接），仅保留最近的 15 条记录。"""
+    wall_path = "benchmarks/wall.md"
     max_display = 15
-    current_rows = table_end - table_start
-    if current_rows > max_display:
-        del lines[table_start + max_display : table_end]
+    header = [
+        "## Live Benchmark Wall\n",
+        "| Time | Repository | Chunks | Syntax % | Meta Density |\n",
+        "| :--- | :--- | :---: | :---: | :---: |\n",
+    ]
 
-    with open(readme_path, "w", encoding="utf-8") as f:
-        f.writelines(lines)
+    rows = []
+    if os.path.exists(wall_path):
+        with open(wall_path, "r", encoding="utf-8") as f:
+            # 跳过标题和表头两行，其余以 "|" 开头的都是数据行
+            rows = [line for line in f.readlines()[len(header):] if line.startswith("|")]
 
+    # 新数据插在最前面，超出部分直接丢弃；展示墙文件很小，整体重写即可
+    rows = [entry + "\n"] + rows[:max_display - 1]
 
-def evaluate_repo(name: str, url: str) -> tuple[str, int, int]:
-    """克隆仓库，运行指标分析。返回 (markdown行, 代码行数, 分块总数)。"""
-    temp_dir = f"temp_eval_{name.replace('/', '_')}"
-    print(f"   [>] Evaluating {name}...")
-    
+    tmp_path = wall_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.writelines(header + rows)
+    os.replace(tmp_path, wall_path)
+
+
+def _temp_dir_for(name: str) -> str:
+    """仓库对应的临时克隆目录，位于 EVAL_TMP 下。"""
+    return os.path.join(EVAL_TMP, f"temp_eval_{name.replace('/', '_')}")
+
+
+def _remove_tree(path: str):
+    """删除临时克隆目录：优先调用 rm -rf（C 实现），不可用时回退到 shutil.rmtree。"""
+    if shutil.which("rm"):
+        subprocess.run(["rm", "-rf", path], check=False)
+    else:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def remote_head(url: str) -> Optional[str]:
+    """通过 git ls-remote 获取远端默认分支的 HEAD 提交（只传输几 KB），失败时返回 None。"""
     try:
-        # 使用浅克隆 (depth 1) 节省空间和时间
-        subprocess.run(
-            ["git", "clone", "--depth", "1", url, temp_dir],
+        result = subprocess.run(
+            ["git", "ls-remote", url, "HEAD"],
             check=True,
             capture_output=True,
-            timeout=180  # 稍微延长克隆时间上限至 3 分钟
+            text=True,
+            env={**os.environ, "GIT_TERMINAL_PROMPT": "0"},
+            timeout=30
         )
-        
-        python_files = get_all_python_files(temp_dir)
-        parser = ASTParser()
-        
-        total_chunks = 0
-        total_meta_fields = 0
-        
-        for f_path in python_files:
-            try:
-                content = read_file(f_path)
-                chunks = parser.parse_source(content, f_path)
-                total_chunks += len(chunks)
-                for c in chunks:
-                    meta_dict = c.metadata.model_dump()
-                    total_meta_fields += len([v for v in meta_dict.values() if v is not None])
-            except Exception:
-                continue
-
-        avg_meta = (total_meta_fields / total_chunks) if total_chunks > 0 else 0
-        loc = count_loc_in_dir(temp_dir)
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M")
-        
-        # 格式化 README 中的展示行
-        entry = f"| {timestamp} | [{name}](https://github.com/{name}) | {total_chunks} | 100% | {avg_meta:.1f} |"
-        return entry, loc, total_chunks
+    except Exception:
+        return None
+    ref_line = result.stdout.split()
+    return ref_line[0] if ref_line else None
+
+
+def _changed_repos(repos: list, known_heads: dict) -> tuple[list, dict]:
+    """
+    过滤掉 HEAD 自上次评估以来未变化的仓库（ls-remote 并行执行）。
+    返回 (需要评估的仓库列表, {仓库名: 当前 HEAD})。
+    """
+    with ThreadPoolExecutor(max_workers=EVAL_WORKERS) as executor:
+        heads = dict(zip((name for name, _, _ in repos), executor.map(remote_head, (url for _, url, _ in repos))))
+
+    changed = []
+    for repo in repos:
+        name = repo[0]
+        if heads[name] and heads[name] == known_heads.get(name):
+            print(f"   [=] Unchanged since last evaluation, skip {name} ({heads[name][:7]})")
+            continue
+        changed.append(repo)
+    return changed, heads
+
+
+def clone_repo(name: str, url: str) -> str:
+    """浅克隆仓库到临时目录，返回目录路径。克隆失败时抛出异常。"""
+    temp_dir = _temp_dir_for(name)
+    git_options = dict(
+        check=True,
+        capture_output=True,
+        env={**os.environ, "GIT_TERMINAL_PROMPT": "0"},  # 私有仓库直接失败，不等待输入
+        timeout=60
+    )
+    # 浅克隆 + 部分克隆 (blob:none)，只拉取默认分支；先不检出，否则检出时仍会下载 HEAD 的全部 blob
+    subprocess.run(
+        [
+            "git", "-c", "protocol.version=2", "clone",
+            "--depth=1", "--single-branch", "--filter=blob:none", "--no-tags", "--no-checkout",
+            url, temp_dir
+        ],
+        **git_options
+    )
+    # 稀疏检出只保留 .py 文件：只下载这些 blob，工作区也更小，遍历和删除都更快
+    subprocess.run(
+        ["git", "-C", temp_dir, "sparse-checkout", "set", "--no-cone", "/*.py", "/**/*.py"],
+        **git_options
+    )
+    subprocess.run(["git", "-C", temp_dir, "checkout"], **git_options)
+    return temp_dir
+
+
+def analyze_repo(name: str, temp_dir: str, parse_pool: Executor) -> tuple[str, int, int]:
+    """分析已克隆的仓库（逐文件解析分发到 parse_pool）。返回 (markdown行, 代码行数, 分块总数)。"""
+    python_files = get_all_python_files(temp_dir)
+
+    loc = 0
+    total_chunks = 0
+    total_meta_fields = 0
+
+    # 逐文件解析是纯 CPU 任务，分发到进程池以绕过 GIL；chunksize 摊薄进程间通信开销
+    for n_loc, n_chunks, n_meta in parse_pool.map(_parse_one, python_files, chunksize=32):
+        loc += n_loc
+        total_chunks += n_chunks
+        total_meta_fields += n_meta
+
+    avg_meta = (total_meta_fields / total_chunks) if total_chunks > 0 else 0
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M")
+    
+    # 格式化 README 中的展示行
+    entry = f"| {timestamp} | [{name}](https://github.com/{name}) | {total_chunks} | 100% | {avg_meta:.1f} |"
+    return entry, loc, total_chunks
+
+
+def evaluate_repo(name: str, url: str, parse_pool: Executor, clone_future: Optional[Future] = None) -> tuple[str, int, int]:
+    """
+    克隆并分析仓库，结束后清理临时目录。返回 (markdown行, 代码行数, 分块总数)，失败时返回 ("", 0, 0)。
+    若传入 clone_future（后台预取的克隆任务），则等待其完成而不再自行克隆。
+    """
+    temp_dir = _temp_dir_for(name)
+    print(f"   [>] Evaluating {name}...")
+    
+    try:
+        if clone_future is not None:
+            clone_future.result()
+        else:
+            clone_repo(name, url)
+        return analyze_repo(name, temp_dir, parse_pool)
 
     except Exception as e:
         print(f"      [!] Error evaluating {name}: {e}")
         return "", 0, 0
     finally:
         if os.path.exists(temp_dir):
-            shutil.rmtree(temp_dir, ignore_errors=True)
+            _remove_tree(temp_dir)
+
+
+def _evaluate_concurrently(repos: list, parse_pool: Executor) -> Iterator[tuple[str, tuple[str, int, int]]]:
+    """EVAL_WORKERS 个仓库并行克隆 + 分析，按完成顺序产出 (仓库名, 评估结果)。"""
+    with ThreadPoolExecutor(max_workers=EVAL_WORKERS) as executor:
+        futures = {executor.submit(evaluate_repo, name, url, parse_pool): name for name, url, _ in repos}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+
+def _evaluate_pipelined(repos: list, parse_pool: Executor) -> Iterator[tuple[str, tuple[str, int, int]]]:
+    """逐个评估仓库，同时由一个后台线程预取下一个仓库的克隆，使网络克隆与 CPU 解析重叠。"""
+    with ThreadPoolExecutor(max_workers=1) as prefetcher:
+        pending = prefetcher.submit(clone_repo, repos[0][0], repos[0][1])
+        # 已预取但尚未交给 evaluate_repo 的仓库名；由 evaluate_repo 接手后负责清理
+        pending_name = repos[0][0]
+        try:
+            for i, (name, url, _) in enumerate(repos):
+                current, pending_name = pending, None
+                if i + 1 < len(repos):
+                    next_name, next_url, _ = repos[i + 1]
+                    pending = prefetcher.submit(clone_repo, next_name, next_url)
+                    pending_name = next_name
+                yield name, evaluate_repo(name, url, parse_pool, clone_future=current)
+        finally:
+            # 调用方中途抛异常或提前退出时，等预取的克隆结束后删除其目录，避免残留在 /dev/shm
+            if pending_name is not None:
+                wait([pending])
+                _remove_tree(_temp_dir_for(pending_name))
 
 
 def main():
     print(f"🚀 Starting Auto-Evolution Cycle: {datetime.now()}")
     
-    # 获取 Trending 列表（已设置为 50）
-    repos = get_trending_python_repos(limit=50)
+    # 获取 Trending 列表（已设置为 50），超出 MAX_REPO_KB 的仓库由 fetcher 记录并跳过
+    repos = get_trending_python_repos(limit=50, max_size_kb=MAX_REPO_KB)
     if not repos:
         print("  [!] No repos fetched. Exiting.")
         return
 
-    for name, url, size in repos:
-        # 执行评估，获取详细数据
-        entry, loc, chunks = evaluate_repo(name, url)
-        
-        if entry:
-            # 1. 更新 README 展示墙（动态滚动）
-            update_readme_wall(entry)
-            
-            # 2. 永久归档到历史记录文件
-            log_to_conquered_history(name, loc, chunks)
-            
-            # 3. 更新全局指标（JSON 和 README 总 LOC）
-            metrics_data = update_metrics_json(name, loc)
-            update_readme_placeholders(metrics_data)
-            
-            print(f"   [+] Success: {name} (LOC: {loc}, Chunks: {chunks})")
+    # metrics.json 只在周期开始时读取一次，周期内在内存中累积，结束时统一写回
+    metrics = load_metrics()
+
+    # 跳过自上次评估以来 HEAD 未变化的仓库
+    repos, heads = _changed_repos(repos, metrics["repo_heads"])
+    if not repos:
+        print(f"🏁 Nothing changed. Cycle complete at {datetime.now()}")
+        return
+
+    # 解析进程池在所有仓库之间共享；使用 spawn 避免在多线程环境下 fork
+    parse_pool = ProcessPoolExecutor(
+        max_workers=os.cpu_count(),
+        mp_context=multiprocessing.get_context("spawn")
+    )
+
+    # 单 worker 时退化为 "克隆下一个 / 解析当前" 的两级流水线
+    evaluate = _evaluate_concurrently if EVAL_WORKERS > 1 else _evaluate_pipelined
+
+    metrics_changed = False
+    try:
+        with parse_pool:
+            # 执行评估，获取详细数据
+            for name, (entry, loc, chunks) in evaluate(repos, parse_pool):
+                if entry:
+                    with _writer_lock:
+                        # 1. 更新展示墙（动态滚动）
+                        update_readme_wall(entry)
+
+                        # 2. 永久归档到历史记录文件
+                        log_to_conquered_history(name, loc, chunks)
+
+                        # 3. 在内存中累积全局指标
+                        metrics_changed |= update_metrics_json(metrics, name, loc, head=heads.get(name))
+
+                    print(f"   [+] Success: {name} (LOC: {loc}, Chunks: {chunks})")
+    finally:
+        # 即使中途出错，也把已完成仓库的指标写回（JSON 和 README 总 LOC）
+        if metrics_changed:
+            save_metrics(metrics)
+            update_readme_placeholders(metrics)
 
     print(f"🏁 Cycle complete at {datetime.now()}")
 
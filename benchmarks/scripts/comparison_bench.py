@@ -4,6 +4,7 @@ and our AST-based PyAST-RAG.
 """
 
 import os
+import asyncio
 from src.parser import ASTParser
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 import google.generativeai as genai
@@ -13,16 +14,14 @@ from dotenv import load_dotenv
 load_dotenv()
 
 
-def get_llm_response(prompt):
-    """Fetches response from Gemini LLM."""
-    api_key = os.getenv("GEMINI_API_KEY")
-    if not api_key:
+async def get_llm_response(prompt):
+    """Fetches response from Gemini LLM. Expects genai to be configured by the caller."""
+    if not os.getenv("GEMINI_API_KEY"):
         return "Error: No API Key found. Please set GEMINI_API_KEY in .env."
 
-    genai.configure(api_key=api_key)
     try:
         model = genai.GenerativeModel('gemini-3-flash-preview')
-        response = model.generate_content(prompt)
+        response = await model.generate_content_async(prompt)
         return response.text
     except Exception as e:
         return f"LLM Error: {str(e)}"
@@ -84,11 +83,24 @@ def run_benchmark():
 问题：{query}
 """
 
+    api_key = os.getenv("GEMINI_API_KEY")
+    if api_key:
+        genai.configure(api_key=api_key)
+
+    # The two requests are independent, so they are sent concurrently
+    async def ask_both():
+        return await asyncio.gather(
+            get_llm_response(prompt_template.format(context=lc_context, query=query)),
+            get_llm_response(prompt_template.format(context=ast_context, query=query))
+        )
+
+    lc_answer, ast_answer = asyncio.run(ask_both())
+
     print("\n--- [Baseline: LangChain] Response ---")
-    print(get_llm_response(prompt_template.format(context=lc_context, query=query)))
+    print(lc_answer)
 
     print("\n--- [Ours: PyAST-RAG] Response ---")
-    print(get_llm_response(prompt_template.format(context=ast_context, query=query)))
+    print(ast_answer)
 
 
 if __name__ == "__main__":
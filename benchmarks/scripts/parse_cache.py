@@ -0,0 +1,98 @@
+"""
+On-disk cache for ASTParser results, shared by the benchmark scripts.
+"""
+
+import os
+import time
+import hashlib
+import pickle
+from typing import List, Union
+from src.parser import ASTParser, CodeChunk
+
+CACHE_DIR = "benchmarks/.ast_cache"
+# Entries neither read nor written for this long are pruned before the cache is saved
+MAX_ENTRY_AGE_DAYS = 7
+
+
+def cached_parse(parser: ASTParser, content: Union[str, bytes], file_path: str) -> List[CodeChunk]:
+    """
+    Parses source code, reusing a pickled result when the same file was parsed before.
+
+    The cache key covers both the path and the content, because chunk metadata
+    records file_path. The parser version is part of the file name, so bumping
+    ASTParser.__version__ invalidates old entries.
+
+    Args:
+        parser (ASTParser): The parser used on a cache miss.
+        content (Union[str, bytes]): The Python source code, as text or as raw UTF-8 bytes.
+        file_path (str): The path to the file (for metadata).
+
+    Returns:
+        List[CodeChunk]: A list of extracted code chunks.
+    """
+    raw = content if isinstance(content, bytes) else content.encode("utf-8")
+    key = hashlib.sha1(file_path.encode("utf-8") + b"\0" + raw).hexdigest()
+    shard_dir = os.path.join(CACHE_DIR, key[:2])
+    cache_path = os.path.join(shard_dir, f"{key}.v{ASTParser.__version__}.pkl")
+
+    try:
+        with open(cache_path, "rb") as f:
+            chunks = pickle.load(f)
+        # Refresh the mtime on a hit: prune_cache ages entries by mtime, since atime is often disabled (noatime)
+        os.utime(cache_path)
+        return chunks
+    except Exception:
+        pass
+
+    if isinstance(content, bytes):
+        chunks = parser.parse_bytes(content, file_path)
+    else:
+        chunks = parser.parse_source(content, file_path)
+
+    # Write to a temp file and rename it into place, so concurrent evaluations never read a half-written pickle
+    os.makedirs(shard_dir, exist_ok=True)
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(chunks, f, protocol=5)
+    os.replace(tmp_path, cache_path)
+    return chunks
+
+
+def prune_cache(max_age_days: float = MAX_ENTRY_AGE_DAYS, cache_dir: str = CACHE_DIR) -> int:
+    """
+    Deletes cache entries that were neither read nor written in the last max_age_days.
+
+    This also drops entries of older parser versions, which are never read again,
+    and leftover temp files of interrupted writes.
+
+    Args:
+        max_age_days (float): Entries older than this many days are deleted.
+        cache_dir (str): The cache directory to prune.
+
+    Returns:
+        int: The number of deleted entries.
+    """
+    cutoff = time.time() - max_age_days * 86400
+    removed = 0
+    if not os.path.isdir(cache_dir):
+        return removed
+
+    for shard in os.scandir(cache_dir):
+        if not shard.is_dir(follow_symlinks=False):
+            continue
+        for entry in os.scandir(shard.path):
+            try:
+                if entry.stat(follow_symlinks=False).st_mtime < cutoff:
+                    os.remove(entry.path)
+                    removed += 1
+            except OSError:
+                continue
+        try:
+            os.rmdir(shard.path)  # only succeeds once the shard is empty
+        except OSError:
+            pass
+    return removed
+
+
+if __name__ == "__main__":
+    print(f"Pruned {prune_cache()} stale entries from {CACHE_DIR}")
@@ -4,10 +4,16 @@ LangChain's fixed-size chunking and PyAST-RAG.
 """
 
 import os
+import matplotlib
+# Headless, file-only rendering: select Agg before pyplot is imported to skip GUI backend probing
+matplotlib.use("Agg")
 import matplotlib.pyplot as plt
 from src.parser import ASTParser
 from src.utils import get_all_python_files, read_file
 
+# Shared parser instance, built once per process
+_PARSER = ASTParser()
+
 
 def run_stats_benchmark():
     """Scans the requests library and calculates how many functions are broken by fixed-size chunking."""
@@ -17,7 +23,6 @@ def run_stats_benchmark():
         return
 
     python_files = get_all_python_files(repo_path)
-    parser = ASTParser()
     
     total_functions = 0
     broken_functions_fixed_800 = 0
@@ -30,7 +35,7 @@ def run_stats_benchmark():
         try:
             content = read_file(file_path)
             # Use AST to extract all functions (including methods)
-            chunks = parser.parse_source(content, file_path)
+            chunks = _PARSER.parse_source(content, file_path)
             
             for chunk in chunks:
                 if chunk.metadata.node_type == "function":
@@ -4,79 +4,121 @@ Script to update global project metrics (Total Repos, Total LOC) and README plac
 
 import os
 import json
+import mmap
 import re
 import sys
+from typing import List, Optional
 from src.utils import get_all_python_files
 
+METRICS_PATH = "benchmarks/results/metrics.json"
 
-def count_loc_in_dir(directory: str) -> int:
-    """Counts effective lines of code (non-empty, non-comment) in a directory."""
+# A line of code is one whose first non-whitespace character is not '#'; one findall over the whole file keeps the scan in C
+_CODE_LINE_RE = re.compile(rb'^[ \t\r\f\v]*[^\s#]', re.MULTILINE)
+
+# README placeholder regions: <!-- TAG -->...<!-- TAG_END -->
+_PLACEHOLDER_RE = re.compile(
+    rb'<!-- (REPO_COUNT|LOC_COUNT|CONQUERED_LIST) -->(.*?)<!-- \1_END -->',
+    re.DOTALL
+)
+
+
+def count_loc_in_bytes(source: bytes) -> int:
+    """Counts effective lines of code (non-empty, non-comment) in raw file content."""
+    return len(_CODE_LINE_RE.findall(source))
+
+
+def count_loc_in_dir(directory: str, files: Optional[List[str]] = None) -> int:
+    """
+    Counts effective lines of code (non-empty, non-comment) in a directory.
+    Pass an already computed Python file list as `files` to skip walking the directory again.
+    """
     loc = 0
-    files = get_all_python_files(directory)
+    if files is None:
+        files = get_all_python_files(directory)
     for f in files:
         try:
-            with open(f, 'r', encoding='utf-8', errors='ignore') as fp:
-                for line in fp:
-                    stripped = line.strip()
-                    if stripped and not stripped.startswith("#"):
-                        loc += 1
+            with open(f, 'rb') as fp:
+                loc += count_loc_in_bytes(fp.read())
         except Exception:
             continue
     return loc
 
 
-def update_metrics_json(repo_name: str, loc: int):
-    """Updates the persistent metrics.json file."""
-    metrics_path = "benchmarks/results/metrics.json"
-    
-    if os.path.exists(metrics_path):
-        with open(metrics_path, 'r') as f:
+def load_metrics() -> dict:
+    """Loads metrics.json, or returns an empty metrics structure if it doesn't exist yet."""
+    if os.path.exists(METRICS_PATH):
+        with open(METRICS_PATH, 'r') as f:
             data = json.load(f)
     else:
         data = {"total_repos": 0, "total_loc": 0, "conquered_repos": []}
+    # Last evaluated HEAD commit per repo, used to skip unchanged repos
+    data.setdefault("repo_heads", {})
+    return data
+
+
+def save_metrics(data: dict):
+    """Writes metrics.json atomically (temp file + os.replace), so a crash never leaves it half-written."""
+    tmp_path = METRICS_PATH + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=4)
+    os.replace(tmp_path, METRICS_PATH)
+
+
+def update_metrics_json(data: dict, repo_name: str, loc: int, head: Optional[str] = None) -> bool:
+    """
+    Records a repo in the in-memory metrics loaded by load_metrics(), optionally with its evaluated HEAD commit.
+    Nothing is written to disk; call save_metrics() once all repos are recorded.
+    Returns True if the metrics changed.
+    """
+    changed = False
     
     if repo_name not in data["conquered_repos"]:
         data["total_repos"] += 1
         data["total_loc"] += loc
         data["conquered_repos"].append(repo_name)
-        
-        with open(metrics_path, 'w') as f:
-            json.dump(data, f, indent=4)
+        changed = True
+
+    if head and data["repo_heads"].get(repo_name) != head:
+        data["repo_heads"][repo_name] = head
+        changed = True
     
-    return data
+    return changed
 
 
 def update_readme_placeholders(data: dict):
-    """Replaces placeholders in README.md with actual stats."""
+    """
+    Replaces placeholders in README.md with actual stats.
+    The README is memory-mapped and only rewritten from the first placeholder whose value changed.
+    """
     readme_path = "README.md"
-    if not os.path.exists(readme_path):
+    if not os.path.exists(readme_path) or os.path.getsize(readme_path) == 0:
         return
-        
-    with open(readme_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    # 1. Update Repo Count
-    content = re.sub(r'<!-- REPO_COUNT -->\d*', f'<!-- REPO_COUNT -->{data["total_repos"]}', content)
-    
-    # 2. Update LOC Count (with comma formatting)
-    content = re.sub(r'<!-- LOC_COUNT -->[\d,]*', f'<!-- LOC_COUNT -->{data["total_loc"]:,}', content)
-    
-    # 3. Update Conquered List (Last 5 repos)
+
+    # Last 5 repos, one per line between the CONQUERED_LIST markers
     repo_links = [f"- 🏆 `{r}`" for r in data["conquered_repos"][-5:]]
-    list_content = "\n".join(repo_links)
-    
-    # Use re.DOTALL to match across lines if needed, 
-    # but here we just look for the placeholder and what follows until next heading or end
-    placeholder = "<!-- CONQUERED_LIST -->"
-    if placeholder in content:
-        parts = content.split(placeholder)
-        # We assume there's a limit or marker after the list. 
-        # For simplicity, we'll just replace the placeholder with the list.
-        # Actually, let's look for a closing marker if we want to be clean.
-        content = parts[0] + placeholder + "\n" + list_content + "\n" + parts[1].split("\n\n")[1] if "\n\n" in parts[1] else parts[0] + placeholder + "\n" + list_content
+    values = {
+        b"REPO_COUNT": str(data["total_repos"]).encode('utf-8'),
+        b"LOC_COUNT": f'{data["total_loc"]:,}'.encode('utf-8'),
+        b"CONQUERED_LIST": ("\n" + "\n".join(repo_links) + "\n").encode('utf-8'),
+    }
+
+    with open(readme_path, 'r+b') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            first_change = next(
+                (m.start() for m in _PLACEHOLDER_RE.finditer(mm) if m.group(2) != values[m.group(1)]),
+                None
+            )
+            if first_change is None:
+                return
+            # All placeholders after the first changed one are rewritten in a single scan
+            tail = _PLACEHOLDER_RE.sub(
+                lambda m: b"<!-- %s -->%s<!-- %s_END -->" % (m.group(1), values[m.group(1)], m.group(1)),
+                mm[first_change:]
+            )
 
-    with open(readme_path, 'w', encoding='utf-8') as f:
-        f.write(content)
+        f.seek(first_change)
+        f.write(tail)
+        f.truncate()
 
 
 if __name__ == "__main__":
@@ -91,6 +133,8 @@ if __name__ == "__main__":
     current_loc = count_loc_in_dir(r_dir)
     print(f"   Done. LOC: {current_loc}")
     
-    updated_data = update_metrics_json(r_name, current_loc)
-    update_readme_placeholders(updated_data)
+    metrics = load_metrics()
+    if update_metrics_json(metrics, r_name, current_loc):
+        save_metrics(metrics)
+    update_readme_placeholders(metrics)
     print("✅ README and metrics.json updated.")
@@ -6,17 +6,25 @@ Integration of Parser, Vector Store, and Gemini LLM.
 import os
 import sys
 import subprocess
-from typing import Optional
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Set
 from dotenv import load_dotenv
-import google.generativeai as genai
 
-from src.parser import ASTParser
-from src.vector_store import CodeBaseStore
-from src.utils import get_all_python_files, read_file
+from src.parser import CodeChunk
+from src.indexer import parse_files
+from src.utils import MAX_FILE_BYTES, MIN_FILE_BYTES, VENDOR_DIRS, get_all_python_files
+
+# The parse workers are spawned, so each of them re-imports this script. ChromaDB and the Gemini SDK
+# take over a second to import and the workers use neither, so they are imported where they are used.
+if TYPE_CHECKING:
+    import google.generativeai as genai
+    from src.vector_store import CodeBaseStore
 
 # Load environment variables from .env file
 load_dotenv()
 
+# Identical on every request, so it forms a stable prefix that Gemini's prompt cache can reuse
+SYSTEM_INSTRUCTION = "你是资深 Python 专家。请根据用户提供的代码片段，详细回答用户的问题。如果代码中没有相关信息，请诚实回答。"
+
 
 def initialize_gemini():
     """Initializes the Gemini AI model."""
@@ -27,9 +35,10 @@ def initialize_gemini():
         return None
     
     try:
+        import google.generativeai as genai
         genai.configure(api_key=api_key)
         # Using gemini-3-flash-preview as requested
-        return genai.GenerativeModel('gemini-3-flash-preview')
+        return genai.GenerativeModel('gemini-3-flash-preview', system_instruction=SYSTEM_INSTRUCTION)
     except Exception as e:
         print(f"\n[!] Error initializing Gemini: {e}")
         return None
@@ -54,35 +63,76 @@ def ensure_data_ready():
     return repo_path
 
 
-def indexing_phase(repo_path: str, store: CodeBaseStore):
-    """Parses all files in the repo and adds them to the vector store."""
+def iter_chunks(python_files: List[str], store: "CodeBaseStore", indexed_hashes: Dict[str, Optional[str]],
+                replaced: Optional[Set[str]] = None,
+                empty_files: Optional[Dict[str, str]] = None) -> Iterator[CodeChunk]:
+    """
+    Parses new and changed files across all CPU cores (see parse_files) and lazily yields their
+    chunks in file order.
+    The stale chunks of a changed file are deleted from the store right before its new ones are yielded,
+    and its path is added to `replaced` (even when it no longer yields any chunks). Files that parse to
+    no chunks are added to `empty_files` with their hash.
+    """
+    for file_path, file_hash, chunks in parse_files(python_files, indexed_hashes):
+        if file_path in indexed_hashes:
+            store.delete_files([file_path])
+            if replaced is not None:
+                replaced.add(file_path)
+        if chunks is None:
+            continue
+        if not chunks and empty_files is not None:
+            empty_files[file_path] = file_hash
+        yield from chunks
+
+
+def indexing_phase(repo_path: str, store: "CodeBaseStore"):
+    """Parses new and changed files in the repo and syncs their chunks into the vector store."""
+    from src.vector_store import BATCH_SIZE
+
     print(f"\n--- Indexing Phase ---")
-    python_files = get_all_python_files(repo_path)
-    parser = ASTParser()
-    
-    all_chunks = []
-    print(f"Found {len(python_files)} Python files. Parsing...")
+    python_files = get_all_python_files(
+        repo_path, min_bytes=MIN_FILE_BYTES, max_bytes=MAX_FILE_BYTES, skip_dirs=VENDOR_DIRS
+    )
     
-    for file_path in python_files:
-        try:
-            content = read_file(file_path)
-            chunks = parser.parse_source(content, file_path)
-            all_chunks.extend(chunks)
-        except Exception as e:
-            print(f"  [!] Skip {file_path} due to error: {e}")
-            
-    print(f"Adding {len(all_chunks)} chunks to Vector Store (ChromaDB)...")
-    store.add_chunks(all_chunks)
-    print(f"Indexing complete. Successfully indexed {len(all_chunks)} code chunks.")
-
-
-def ask_code(query: str, store: CodeBaseStore, model: Optional[genai.GenerativeModel]):
+    # Files indexed by a previous run that no longer exist
+    indexed_hashes = store.get_file_hashes()
+    removed = set(indexed_hashes) - set(python_files)
+    store.delete_files(removed)
+
+    print(f"Found {len(python_files)} Python files. Parsing and adding chunks to Vector Store (ChromaDB)...")
+    # Chunks are streamed into the store in batches instead of being collected in memory first
+    replaced = set()
+    empty_files = {}
+    total = store.add_chunks(
+        iter_chunks(python_files, store, indexed_hashes, replaced, empty_files), batch_size=BATCH_SIZE
+    )
+    store.record_empty_files(empty_files)
+    print(f"Indexing complete. Successfully indexed {total} code chunks ({store.collection.count()} in store).")
+
+    # Cached answers may describe code that has just changed, including files that now have no chunks
+    if total or removed or replaced:
+        store.clear_query_cache()
+
+
+def ask_code(query: str, store: "CodeBaseStore", model: Optional["genai.GenerativeModel"]):
     """
     RAG Pipeline:
+    0. Cache: Reuse the answer to a previous, semantically similar question.
     1. Retrieval: Search relevant code chunks.
-    2. Context: Format chunks into a prompt.
-    3. Generation: Get answer from LLM.
+    2. Context: Format chunks into the user message (instructions are the system instruction).
+    3. Generation: Get answer from LLM (and cache it).
     """
+    # 0. Semantic cache: a repeated or paraphrased question reuses the previous answer
+    cached_answer = store.lookup_answer(query)
+    if cached_answer is not None:
+        print("\n[Cache] A similar question was answered before; reusing that answer.")
+        print("\n" + "="*60)
+        print("AI ANSWER (cached):")
+        print("="*60)
+        print(cached_answer)
+        print("="*60)
+        return
+
     # 1. Retrieval
     print(f"\n[Step 1] Retrieving relevant code snippets for: '{query}'")
     chunks = store.search(query, n_results=5)
@@ -93,8 +143,9 @@ def ask_code(query: str, store: CodeBaseStore, model: Optional[genai.GenerativeM
     
     # 2. Context Preparation
     context_parts = []
+    cwd = os.getcwd()
     for i, chunk in enumerate(chunks):
-        rel_path = os.path.relpath(chunk.metadata.file_path, os.getcwd())
+        rel_path = os.path.relpath(chunk.metadata.file_path, cwd)
         parent_info = f" (Class: {chunk.metadata.parent_name})" if chunk.metadata.parent_name else ""
         header = f"Snippet {i+1} | File: {rel_path} | Name: {chunk.metadata.name}{parent_info}"
         part = f"{header}\n```python\n{chunk.content}\n```"
@@ -103,22 +154,31 @@ def ask_code(query: str, store: CodeBaseStore, model: Optional[genai.GenerativeM
     context_code = "\n\n".join(context_parts)
     
     # 3. Generation
-    prompt = f"""你是资深 Python 专家。以下是根据用户的提问检索到的相关代码片段：
----
-{context_code}
----
-用户的问题是：{query}
-请根据以上代码片段，详细回答用户的问题。如果代码中没有相关信息，请诚实回答。"""
+    # The fixed instructions live in the model's system_instruction; only the volatile parts go here
+    contents = [{
+        "role": "user",
+        "parts": [
+            f"以下是根据用户的提问检索到的相关代码片段：\n---\n{context_code}\n---",
+            f"用户的问题是：{query}",
+        ],
+    }]
 
     if model:
         print("[Step 2] Generating answer using Gemini...")
         try:
-            response = model.generate_content(prompt)
+            # Stream the answer so it starts printing as soon as the first part arrives
+            response = model.generate_content(contents, stream=True)
             print("\n" + "="*60)
             print("AI ANSWER:")
             print("="*60)
-            print(response.text)
+            answer_parts = []
+            for part in response:
+                sys.stdout.write(part.text)
+                sys.stdout.flush()
+                answer_parts.append(part.text)
+            print()
             print("="*60)
+            store.cache_answer(query, "".join(answer_parts))
         except Exception as e:
             print(f"\n[!] Error during generation: {e}")
     else:
@@ -128,18 +188,16 @@ def ask_code(query: str, store: CodeBaseStore, model: Optional[genai.GenerativeM
 
 
 def main():
+    from src.vector_store import CodeBaseStore
+
     # Setup
     repo_path = ensure_data_ready()
     store = CodeBaseStore(collection_name="requests_rag", persist_directory="./chroma_db")
     model = initialize_gemini()
     
     # Indexing
-    # Check if we should re-index (optional: for this demo we index every time or check counts)
-    # ChromaDB add is idempotent if IDs match, but we can check if it's empty.
-    if store.collection.count() == 0:
-        indexing_phase(repo_path, store)
-    else:
-        print(f"\nUsing existing index with {store.collection.count()} chunks.")
+    # Incremental: files whose content hash is already in the store are skipped without parsing
+    indexing_phase(repo_path, store)
     
     # Interactive Loop
     print("\n" + "*"*50)
@@ -0,0 +1,92 @@
+"""
+Parallel parsing for the indexing phase.
+
+This module is what the spawned worker processes import, so it depends only on the parser
+and utils: importing main.py would pull ChromaDB and the Gemini SDK into every worker.
+"""
+
+import os
+import multiprocessing
+from collections import deque
+from itertools import chain
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+from src.parser import ASTParser, CodeChunk
+from src.utils import hash_content, read_file
+
+# One parser per process: building the tree-sitter backend is not free, so don't do it per file
+_PARSER = ASTParser()
+
+# Files being parsed at once; bounds how many parsed-but-unconsumed results sit in memory
+MAX_PENDING_FILES = (os.cpu_count() or 1) * 4
+
+
+def parse_one(file_path: str, content: str, file_hash: str) -> Optional[List[CodeChunk]]:
+    """
+    Parses a single file. Runs inside a worker process of parse_files.
+
+    Returns None when the file can't be parsed.
+    """
+    try:
+        chunks = _PARSER.parse_source(content, file_path)
+        for chunk in chunks:
+            chunk.metadata.file_hash = file_hash
+            chunk.metadata.file_chunk_count = len(chunks)
+        return chunks
+    except Exception as e:
+        print(f"  [!] Skip {file_path} due to error: {e}")
+        return None
+
+
+def _changed_files(python_files: List[str],
+                   indexed_hashes: Dict[str, Optional[str]]) -> Iterator[Tuple[str, Optional[str], Optional[str]]]:
+    """
+    Reads and hashes the files in this process and yields (file_path, content, file_hash) for the new
+    and changed ones; content and file_hash are None for a file that can't be read.
+    """
+    for file_path in python_files:
+        try:
+            content = read_file(file_path)
+        except Exception as e:
+            print(f"  [!] Skip {file_path} due to error: {e}")
+            yield file_path, None, None
+            continue
+        file_hash = hash_content(content.encode('utf-8'))
+        if file_hash != indexed_hashes.get(file_path):
+            yield file_path, content, file_hash
+
+
+def parse_files(python_files: List[str], indexed_hashes: Dict[str, Optional[str]]
+                ) -> Iterator[Tuple[str, Optional[str], Optional[List[CodeChunk]]]]:
+    """
+    Parses the new and changed files across all CPU cores and lazily yields (file_path, file_hash, chunks)
+    in file order; chunks is None for a file that couldn't be read or parsed.
+
+    Unchanged files are detected by hashing in this process, and the process pool is only started once
+    a file actually needs parsing, so a re-run over an unchanged repo costs little more than reading it.
+    At most MAX_PENDING_FILES files are in flight, so memory stays bounded however large the repo is.
+    """
+    changed = _changed_files(python_files, indexed_hashes)
+    first = next(changed, None)
+    if first is None:
+        return
+
+    jobs = chain([first], changed)
+    pending = deque()
+    with ProcessPoolExecutor(mp_context=multiprocessing.get_context("spawn")) as executor:
+        def submit_next():
+            job = next(jobs, None)
+            if job is not None:
+                file_path, content, file_hash = job
+                future = executor.submit(parse_one, file_path, content, file_hash) if content is not None else None
+                pending.append((file_path, file_hash, future))
+
+        for _ in range(MAX_PENDING_FILES):
+            submit_next()
+
+        while pending:
+            file_path, file_hash, future = pending.popleft()
+            chunks = future.result() if future is not None else None
+            # Refill the window as each result is consumed
+            submit_next()
+            yield file_path, file_hash, chunks
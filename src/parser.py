@@ -3,11 +3,25 @@ Parser module for extracting structured code chunks from Python source files usi
 """
 
 import ast
+import bisect
+import re
+import sys
+import unicodedata
+from dataclasses import dataclass, field
 from typing import List, Tuple, Optional, Dict, Any
-from pydantic import BaseModel, Field
 
+try:
+    import tree_sitter_python
+    from tree_sitter import Language, Parser, Query, QueryCursor
+except ImportError:  # Optional accelerated backend; the ast visitor is used instead
+    tree_sitter_python = None
 
-class ChunkMetadata(BaseModel):
+# Line terminators recognized by the Python tokenizer (form feeds are not line breaks)
+_NEWLINE_RE = re.compile(r'\r\n|\r|\n')
+
+
+@dataclass(slots=True)
+class ChunkMetadata:
     """
     Metadata for a code chunk.
 
@@ -18,16 +32,22 @@ class ChunkMetadata(BaseModel):
         line_range (Tuple[int, int]): The start and end line numbers.
         parent_name (Optional[str]): The name of the parent class, if any.
         dependencies (List[str]): A list of detected function calls or attribute accesses.
+        file_hash (Optional[str]): Hash of the source file's content, set when the chunk is indexed.
+        file_chunk_count (Optional[int]): Number of chunks the whole file produced, set when the
+            chunk is indexed; lets the store tell a completely indexed file from a partial one.
     """
     file_path: str
     node_type: str
     name: str
     line_range: Tuple[int, int]
     parent_name: Optional[str] = None
-    dependencies: List[str] = Field(default_factory=list)
+    dependencies: List[str] = field(default_factory=list)
+    file_hash: Optional[str] = None
+    file_chunk_count: Optional[int] = None
 
 
-class CodeChunk(BaseModel):
+@dataclass(slots=True)
+class CodeChunk:
     """
     A structured code chunk extracted from source code.
 
@@ -56,55 +76,80 @@ class ChunkVisitor(ast.NodeVisitor):
         self.file_path = file_path
         self.chunks: List[CodeChunk] = []
         self.parent_stack: List[str] = []
+        # Call names collected for each definition currently being visited (innermost last)
+        self.dependency_stack: List[set] = []
+        # Start offset of every line, computed once so each segment is a direct slice
+        self._line_starts = [0] + [m.end() for m in _NEWLINE_RE.finditer(source_code)]
 
     def visit_ClassDef(self, node: ast.ClassDef):
         """Processes a class definition."""
-        chunk = self._create_chunk(node, "class")
-        self.chunks.append(chunk)
-
-        self.parent_stack.append(node.name)
-        self.generic_visit(node)
-        self.parent_stack.pop()
+        self._visit_definition(node, "class", is_scope=True)
 
     def visit_FunctionDef(self, node: ast.FunctionDef):
         """Processes a function definition."""
-        chunk = self._create_chunk(node, "function")
-        self.chunks.append(chunk)
-
         # We don't push functions to parent_stack to avoid nested function parent tracking
         # as usually we care about the class context.
-        self.generic_visit(node)
+        self._visit_definition(node, "function", is_scope=False)
 
     def visit_AsyncFunctionDef(self, node: ast.AsyncFunctionDef):
         """Processes an async function definition."""
-        chunk = self._create_chunk(node, "function")
-        self.chunks.append(chunk)
+        self._visit_definition(node, "function", is_scope=False)
+
+    def visit_Call(self, node: ast.Call):
+        """Records a call (simple name or attribute) against the innermost definition."""
+        if self.dependency_stack:
+            if isinstance(node.func, ast.Name):
+                self.dependency_stack[-1].add(node.func.id)
+            elif isinstance(node.func, ast.Attribute):
+                self.dependency_stack[-1].add(node.func.attr)
         self.generic_visit(node)
 
-    def _create_chunk(self, node: Any, node_type: str) -> CodeChunk:
+    def _visit_definition(self, node: Any, node_type: str, is_scope: bool):
+        """
+        Visits a definition and its subtree once, then emits its chunk.
+
+        The chunk's slot is reserved before the subtree is visited so chunks stay
+        in source order (outer definitions before the ones nested in them).
+
+        Args:
+            node: The AST node.
+            node_type: The type of the node.
+            is_scope: Whether nested definitions should report this node as their parent.
+        """
+        parent_name = self.parent_stack[-1] if self.parent_stack else None
+        index = len(self.chunks)
+        self.chunks.append(None)
+
+        self.dependency_stack.append(set())
+        if is_scope:
+            self.parent_stack.append(node.name)
+        self.generic_visit(node)
+        if is_scope:
+            self.parent_stack.pop()
+        dependencies = self.dependency_stack.pop()
+
+        # Calls made by nested definitions also count towards the enclosing ones
+        if self.dependency_stack:
+            self.dependency_stack[-1].update(dependencies)
+
+        self.chunks[index] = self._create_chunk(node, node_type, parent_name, dependencies)
+
+    def _create_chunk(self, node: Any, node_type: str, parent_name: Optional[str],
+                      dependencies: set) -> CodeChunk:
         """
         Creates a CodeChunk from an AST node.
 
         Args:
             node: The AST node.
             node_type: The type of the node.
+            parent_name: The name of the enclosing class, if any.
+            dependencies: Names of the calls made within the node.
 
         Returns:
             CodeChunk: The created chunk.
         """
-        parent_name = self.parent_stack[-1] if self.parent_stack else None
-
         # Extract source content
-        content = ast.get_source_segment(self.source_code, node) or ""
-
-        # Extract dependencies (simple call detection)
-        dependencies = set()
-        for child in ast.walk(node):
-            if isinstance(child, ast.Call):
-                if isinstance(child.func, ast.Name):
-                    dependencies.add(child.func.id)
-                elif isinstance(child.func, ast.Attribute):
-                    dependencies.add(child.func.attr)
+        content = self._segment(node)
 
         metadata = ChunkMetadata(
             file_path=self.file_path,
@@ -117,16 +162,226 @@ class ChunkVisitor(ast.NodeVisitor):
 
         return CodeChunk(content=content, metadata=metadata)
 
+    def _segment(self, node: Any) -> str:
+        """
+        Returns the source text of a node, equivalent to ast.get_source_segment.
+
+        Args:
+            node: The AST node.
+
+        Returns:
+            str: The source segment, or an empty string if it cannot be located.
+        """
+        if getattr(node, "end_lineno", None) is None or getattr(node, "end_col_offset", None) is None:
+            return ast.get_source_segment(self.source_code, node) or ""
+
+        start = self._offset(node.lineno, node.col_offset)
+        end = self._offset(node.end_lineno, node.end_col_offset)
+        return self.source_code[start:end]
+
+    def _offset(self, lineno: int, col_offset: int) -> int:
+        """
+        Converts an AST position into an index into the source string.
+
+        Args:
+            lineno (int): The 1-based line number.
+            col_offset (int): The column, counted in UTF-8 bytes as the ast module does.
+
+        Returns:
+            int: The character index into source_code.
+        """
+        line_start = self._line_starts[lineno - 1]
+        if self.source_code[line_start:line_start + col_offset].isascii():
+            return line_start + col_offset
+
+        # Non-ASCII text before the column: map the byte offset back to a character offset
+        line_end = self._line_starts[lineno] if lineno < len(self._line_starts) else len(self.source_code)
+        line_bytes = self.source_code[line_start:line_end].encode('utf-8')
+        return line_start + len(line_bytes[:col_offset].decode('utf-8', errors='ignore'))
+
+
+class TreeSitterChunker:
+    """
+    Extracts the same chunks as ChunkVisitor using the tree-sitter Python grammar.
+
+    Definitions and calls are matched by a single query that runs in C, so only the
+    matches (not every node) are touched from Python. Files the grammar cannot map
+    faithfully onto the ast semantics make parse() return None so the caller can fall
+    back to ChunkVisitor.
+    """
+
+    # Constructs that either aren't Python 3 or that tree-sitter is known to misparse
+    # (e.g. `type(obj).attr = value` is read as a PEP 695 type alias).
+    QUERY = """
+    [(type_alias_statement) (print_statement) (exec_statement)] @unsupported
+    (class_definition) @class
+    (function_definition) @function
+    (call function: (_) @callee)
+    """
+
+    # Nodes wrapping a callee, e.g. `(obj.method)()`; tree-sitter also reads `*f(x)` as a call of `*f`
+    _CALLEE_WRAPPERS = {"parenthesized_expression", "list_splat"}
+
+    def __init__(self):
+        """Initialize the tree-sitter parser and compile the query."""
+        language = Language(tree_sitter_python.language())
+        self._parser = Parser(language)
+        self._query = Query(language, self.QUERY)
+
+    def parse(self, source: bytes, file_path: str) -> Optional[List[CodeChunk]]:
+        """
+        Parses UTF-8 encoded source code.
+
+        Args:
+            source (bytes): The Python source code as UTF-8 bytes.
+            file_path (str): The path to the file (for metadata).
+
+        Returns:
+            Optional[List[CodeChunk]]: The extracted chunks, or None if the file has to be
+            handled by the ast backend (syntax errors, unsupported constructs, or input the
+            two disagree on: null bytes, a byte order mark, bare carriage returns).
+        """
+        if b"\0" in source or source.startswith(b"\xef\xbb\xbf"):
+            return None
+        if b"\r" in source and source.count(b"\r") != source.count(b"\r\n"):
+            return None  # tree-sitter only counts "\n" as a line break
+        tree = self._parser.parse(source)
+        if tree.root_node.has_error:
+            return None
+        captures = QueryCursor(self._query).captures(tree.root_node)
+        if "unsupported" in captures:
+            return None
+
+        definitions = [(node, "class") for node in captures.get("class", [])]
+        definitions += [(node, "function") for node in captures.get("function", [])]
+        definitions.sort(key=lambda d: d[0].start_byte)
+
+        callees = sorted(captures.get("callee", []), key=lambda node: node.start_byte)
+        call_starts = [node.start_byte for node in callees]
+        call_names = [self._callee_name(node) for node in callees]
+
+        chunks = []
+        # (end_byte, class name or None) of the definitions enclosing the current one
+        scopes: List[Tuple[int, Optional[str]]] = []
+        for node, node_type in definitions:
+            while scopes and scopes[-1][0] <= node.start_byte:
+                scopes.pop()
+            parent_name = next((name for _, name in reversed(scopes) if name is not None), None)
+            name = self._identifier(node.child_by_field_name("name"))
+
+            # Like ast, decorators belong to the definition but trailing comments don't
+            last = self._last_token(node)
+            start = node.parent.start_byte if node.parent.type == "decorated_definition" else node.start_byte
+            lo = bisect.bisect_left(call_starts, start)
+            hi = bisect.bisect_left(call_starts, node.end_byte)
+            dependencies = set(call_names[lo:hi])
+            dependencies.discard(None)
+
+            metadata = ChunkMetadata(
+                file_path=file_path,
+                node_type=node_type,
+                name=name,
+                line_range=(node.start_point[0] + 1, last.end_point[0] + 1),
+                parent_name=parent_name,
+                dependencies=list(dependencies)
+            )
+            content = source[node.start_byte:last.end_byte].decode('utf-8')
+            chunks.append(CodeChunk(content=content, metadata=metadata))
+            scopes.append((node.end_byte, name if node_type == "class" else None))
+        return chunks
+
+    @staticmethod
+    def _identifier(node: Any) -> str:
+        """Returns an identifier's text, NFKC-normalized and interned as the Python tokenizer does."""
+        text = node.text.decode('utf-8')
+        return sys.intern(text if text.isascii() else unicodedata.normalize("NFKC", text))
+
+    @classmethod
+    def _callee_name(cls, node: Any) -> Optional[str]:
+        """Returns the dependency name of a call's function, mirroring ChunkVisitor.visit_Call."""
+        while node.type in cls._CALLEE_WRAPPERS:
+            if node.named_child_count != 1:
+                return None
+            node = node.named_children[0]
+        if node.type == "identifier":
+            return cls._identifier(node)
+        if node.type == "attribute":
+            return cls._identifier(node.child_by_field_name("attribute"))
+        return None
+
+    @staticmethod
+    def _last_token(node: Any) -> Any:
+        """Returns the last non-comment token of a node, where ast ends its position."""
+        while node.child_count:
+            child = node.child(node.child_count - 1)
+            while child is not None and child.type == "comment":
+                child = child.prev_sibling
+            if child is None:
+                break
+            node = child
+        return node
+
 
 class ASTParser:
     """
     Parser for Python source code using AST.
     """
 
+    # Bump whenever the chunk output changes, so cached parse results are invalidated.
+    __version__ = "4"
+
+    def __init__(self, use_tree_sitter: bool = True):
+        """
+        Initialize the parser.
+
+        Args:
+            use_tree_sitter (bool): Use the tree-sitter backend when it is installed.
+                Both backends produce the same chunks.
+        """
+        self._tree_sitter = TreeSitterChunker() if use_tree_sitter and tree_sitter_python else None
+
     def parse_source(self, source_code: str, file_path: str) -> List[CodeChunk]:
         """
         Parses the given source code.
 
+        Args:
+            source_code (str): The Python source code.
+            file_path (str): The path to the file (for metadata).
+
+        Returns:
+            List[CodeChunk]: A list of extracted code chunks.
+        """
+        if self._tree_sitter:
+            chunks = self._tree_sitter.parse(source_code.encode('utf-8'), file_path)
+            if chunks is not None:
+                return chunks
+        return self._parse_with_ast(source_code, file_path)
+
+    def parse_bytes(self, source: bytes, file_path: str) -> List[CodeChunk]:
+        """
+        Parses UTF-8 encoded source code, e.g. a file that was read in binary mode.
+
+        Args:
+            source (bytes): The Python source code as UTF-8 bytes.
+            file_path (str): The path to the file (for metadata).
+
+        Returns:
+            List[CodeChunk]: A list of extracted code chunks.
+
+        Raises:
+            UnicodeDecodeError: If the source is not valid UTF-8.
+        """
+        source_code = source.decode('utf-8')
+        if self._tree_sitter:
+            chunks = self._tree_sitter.parse(source, file_path)
+            if chunks is not None:
+                return chunks
+        return self._parse_with_ast(source_code, file_path)
+
+    def _parse_with_ast(self, source_code: str, file_path: str) -> List[CodeChunk]:
+        """
+        Parses source code with the ast module and ChunkVisitor.
+
         Args:
             source_code (str): The Python source code.
             file_path (str): The path to the file (for metadata).
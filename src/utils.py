@@ -3,7 +3,14 @@ Utility functions for the Python-AST-RAG project.
 """
 
 import os
-from typing import List
+from typing import Iterable, Iterator, List, Optional
+import xxhash
+
+# Indexing filters: a file shorter than "def f():0" can't define anything, larger files are
+# almost always generated or bundled code, and these directories hold vendored or build output.
+MIN_FILE_BYTES = 9
+MAX_FILE_BYTES = 512_000
+VENDOR_DIRS = ("_vendor", "site-packages", ".tox", "build")
 
 
 def read_file(file_path: str) -> str:
@@ -27,19 +34,80 @@ def read_file(file_path: str) -> str:
         raise IOError(f"Error reading file {file_path}: {e}")
 
 
-def get_all_python_files(directory: str) -> List[str]:
+def hash_content(content: bytes) -> str:
+    """
+    Computes the content hash used to detect changed files between indexing runs.
+
+    Args:
+        content (bytes): Raw file content.
+
+    Returns:
+        str: Hex digest of the content.
+    """
+    return xxhash.xxh3_128_hexdigest(content)
+
+
+def iter_python_files(directory: str, min_bytes: int = 0, max_bytes: Optional[int] = None,
+                      skip_dirs: Iterable[str] = ()) -> Iterator[str]:
+    """
+    Lazily yields Python files under a directory, in the same order as os.walk.
+
+    Uses os.scandir directly: the file type comes from the directory entry itself, so
+    files are only stat'ed when a size limit is set. Symlinked directories are not
+    followed and unreadable directories are skipped, as with os.walk. With a size limit,
+    files that can't be stat'ed (e.g. dangling symlinks) are skipped individually.
+
+    Args:
+        directory (str): The directory to search.
+        min_bytes (int): Skip files smaller than this many bytes.
+        max_bytes (Optional[int]): Skip files larger than this many bytes.
+        skip_dirs (Iterable[str]): Directory names that are not descended into.
+
+    Yields:
+        str: Paths to Python files.
+    """
+    skip_dirs = set(skip_dirs)
+    check_size = min_bytes > 0 or max_bytes is not None
+    pending = [directory]
+    while pending:
+        subdirs = []
+        try:
+            with os.scandir(pending.pop()) as entries:
+                for entry in entries:
+                    # A failing entry (dangling symlink, file deleted mid-walk) only skips itself
+                    try:
+                        if entry.is_dir():
+                            if entry.name not in skip_dirs and not entry.is_symlink():
+                                subdirs.append(entry.path)
+                            continue
+                        if not entry.name.endswith('.py'):
+                            continue
+                        if check_size:
+                            size = entry.stat().st_size
+                            if size < min_bytes or (max_bytes is not None and size > max_bytes):
+                                continue
+                    except OSError:
+                        continue
+                    yield entry.path
+        except OSError:
+            # Only an unreadable directory is skipped as a whole
+            continue
+        # Depth-first, visiting subdirectories in listing order like os.walk
+        pending.extend(reversed(subdirs))
+
+
+def get_all_python_files(directory: str, min_bytes: int = 0, max_bytes: Optional[int] = None,
+                         skip_dirs: Iterable[str] = ()) -> List[str]:
     """
     Recursively finds all Python files in a directory.
 
     Args:
         directory (str): The directory to search.
+        min_bytes (int): Skip files smaller than this many bytes.
+        max_bytes (Optional[int]): Skip files larger than this many bytes.
+        skip_dirs (Iterable[str]): Directory names that are not descended into.
 
     Returns:
         List[str]: A list of paths to Python files.
     """
-    python_files = []
-    for root, _, files in os.walk(directory):
-        for file in files:
-            if file.endswith('.py'):
-                python_files.append(os.path.join(root, file))
-    return python_files
+    return list(iter_python_files(directory, min_bytes, max_bytes, skip_dirs))
@@ -2,9 +2,52 @@
 Vector store module for persistent storage and retrieval of code chunks using ChromaDB.
 """
 
+import time
 import chromadb
-from typing import List, Optional, Dict, Any
+import xxhash
+from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+from functools import lru_cache
+from typing import Callable, Iterable, List, Optional, Dict, Any
 from src.parser import CodeChunk, ChunkMetadata
+from src.utils import hash_content
+
+try:
+    from sentence_transformers import SentenceTransformer
+except ImportError:  # Optional; Chroma's bundled ONNX build of the same model is used instead
+    SentenceTransformer = None
+
+# ChromaDB insert throughput plateaus at a few hundred items per call;
+# larger single calls only add memory pressure.
+BATCH_SIZE = 200
+
+# Same model as Chroma's default embedding function, so either backend fills the same vector space
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+EMBED_BATCH_SIZE = 128
+
+# Cached answers are reused for questions within this cosine distance of a previous one
+QUERY_CACHE_DISTANCE = 0.15
+QUERY_CACHE_SIZE = 1000
+
+Embedder = Callable[[List[str]], List[Any]]
+
+
+@lru_cache(maxsize=None)
+def default_embedder() -> Embedder:
+    """
+    Returns the process-wide embedder used when CodeBaseStore is given none.
+
+    Uses sentence-transformers when installed (batched, on GPU if one is available);
+    otherwise Chroma's default ONNX embedding function. Both return normalized vectors.
+
+    Returns:
+        Embedder: A function mapping a list of texts to their embeddings.
+    """
+    if SentenceTransformer is not None:
+        model = SentenceTransformer(EMBEDDING_MODEL)
+        return lambda texts: model.encode(
+            texts, batch_size=EMBED_BATCH_SIZE, normalize_embeddings=True, convert_to_numpy=True
+        ).tolist()
+    return DefaultEmbeddingFunction()
 
 
 class CodeBaseStore:
@@ -12,64 +55,160 @@ class CodeBaseStore:
     Encapsulates ChromaDB operations for storing and searching code chunks.
     """
 
-    def __init__(self, collection_name: str = "code_rag", persist_directory: str = "./chroma_db"):
+    def __init__(self, collection_name: str = "code_rag", persist_directory: str = "./chroma_db",
+                 embedder: Optional[Embedder] = None, query_cache_size: int = QUERY_CACHE_SIZE):
         """
         Initialize the ChromaDB client and collection.
 
         Args:
             collection_name (str): Name of the collection.
             persist_directory (str): Directory for data persistence.
+            embedder (Optional[Embedder]): Maps a list of texts to embeddings. Defaults to
+                default_embedder(). Embeddings are computed here and passed to ChromaDB,
+                so the collection has no embedding function of its own.
+            query_cache_size (int): Maximum number of answers kept in the query cache.
         """
+        self.embed = embedder or default_embedder()
         self.client = chromadb.PersistentClient(path=persist_directory)
-        self.collection = self.client.get_or_create_collection(name=collection_name)
+        self.collection = self.client.get_or_create_collection(name=collection_name, embedding_function=None)
+
+        # Files that produced no chunks, with their content hash, so unchanged ones aren't parsed again
+        self.empty_files = self.client.get_or_create_collection(
+            name=f"{collection_name}_empty_files", embedding_function=None
+        )
 
-    def add_chunks(self, chunks: List[CodeChunk]):
+        # Answers to previous questions, looked up by the embedding of the question
+        self.query_cache_name = f"{collection_name}_query_cache"
+        self.query_cache_size = query_cache_size
+        self.query_cache = self._open_query_cache()
+        self._last_query: Optional[str] = None
+        self._last_query_embedding: Optional[List[Any]] = None
+
+    def add_chunks(self, chunks: Iterable[CodeChunk], batch_size: int = BATCH_SIZE) -> int:
         """
-        Adds a list of code chunks to the vector store.
+        Adds code chunks to the vector store, one `collection.upsert` call per batch.
         Handles serialization of metadata fields not supported by ChromaDB.
 
         Args:
-            chunks (List[CodeChunk]): List of code chunks to add.
-        """
-        if not chunks:
-            return
+            chunks (Iterable[CodeChunk]): Code chunks to add; may be a lazy generator.
+            batch_size (int): Number of chunks sent to ChromaDB per call.
 
+        Returns:
+            int: The number of chunks added.
+        """
         documents = []
         metadatas = []
         ids = []
+        total = 0
 
         for chunk in chunks:
             documents.append(chunk.content)
             
-            # Serialize metadata from the Pydantic model
-            meta_dict = chunk.metadata.model_dump()
-            
-            # 1. 处理 dependencies: List[str] -> str
-            if "dependencies" in meta_dict:
-                meta_dict["dependencies"] = ",".join(meta_dict["dependencies"])
-            
-            # 2. 处理 line_range: Tuple[int, int] -> start/end line fields
-            if "line_range" in meta_dict:
-                line_range = meta_dict.pop("line_range")
-                meta_dict["start_line"] = line_range[0]
-                meta_dict["end_line"] = line_range[1]
-            
+            # Build the ChromaDB metadata directly: lists and tuples are flattened into
+            # scalar fields and None values are left out (ChromaDB supports neither)
+            meta = chunk.metadata
+            meta_dict = {
+                "file_path": meta.file_path,
+                "node_type": meta.node_type,
+                "name": meta.name,
+                # 1. 处理 dependencies: List[str] -> str
+                "dependencies": ",".join(meta.dependencies),
+                # 2. 处理 line_range: Tuple[int, int] -> start/end line fields
+                "start_line": meta.line_range[0],
+                "end_line": meta.line_range[1],
+            }
             # 3. 确保没有 None 值 (ChromaDB 不支持 None)
-            meta_dict = {k: v for k, v in meta_dict.items() if v is not None}
-                
+            if meta.parent_name is not None:
+                meta_dict["parent_name"] = meta.parent_name
+            if meta.file_hash is not None:
+                meta_dict["file_hash"] = meta.file_hash
+            if meta.file_chunk_count is not None:
+                meta_dict["file_chunk_count"] = meta.file_chunk_count
+
             metadatas.append(meta_dict)
             
-            # Create a unique ID for each chunk
-            # Include line number to ensure uniqueness even with same names in a file
-            chunk_id = f"{chunk.metadata.file_path}:{chunk.metadata.name}:{chunk.metadata.line_range[0]}"
-            ids.append(chunk_id)
-
-        self.collection.add(
-            documents=documents,
-            metadatas=metadatas,
-            ids=ids
+            # Content-addressed ID: the same chunk always maps to the same row, so re-adding it
+            # (e.g. after an interrupted run) overwrites instead of raising on a duplicate ID.
+            # No two definitions in a file start on the same line. The 64-bit digest keeps IDs
+            # short (16 hex chars); deletes by file go through the file_path metadata instead.
+            id_source = f"{meta.file_path}:{meta.line_range[0]}:{chunk.content}"
+            ids.append(xxhash.xxh3_64_hexdigest(id_source.encode('utf-8')))
+
+            if len(documents) >= batch_size:
+                self._upsert(documents, metadatas, ids)
+                total += len(documents)
+                documents, metadatas, ids = [], [], []
+
+        if documents:
+            self._upsert(documents, metadatas, ids)
+            total += len(documents)
+
+        return total
+
+    def _upsert(self, documents: List[str], metadatas: List[Dict[str, Any]], ids: List[str]):
+        """Embeds one batch of documents and upserts it."""
+        self.collection.upsert(
+            documents=documents, metadatas=metadatas, ids=ids, embeddings=self.embed(documents)
         )
 
+    def get_file_hashes(self) -> Dict[str, Optional[str]]:
+        """
+        Returns the content hash recorded for every file that has chunks in the store, or
+        that was recorded with record_empty_files.
+
+        A file only reports its hash once all of its chunks are stored: chunks are added in
+        batches that span files, so an interrupted run can leave a file partially indexed.
+
+        Returns:
+            Dict[str, Optional[str]]: Mapping of file path to file hash (None if it was
+            indexed without one or is incomplete, so it gets re-indexed).
+        """
+        records = self.collection.get(include=["metadatas"])
+
+        files: Dict[str, Dict[str, Any]] = {}
+        for meta in records["metadatas"]:
+            entry = files.setdefault(meta["file_path"], {
+                "hash": meta.get("file_hash"), "expected": meta.get("file_chunk_count"), "stored": 0
+            })
+            entry["stored"] += 1
+            if meta.get("file_hash") != entry["hash"]:
+                entry["hash"] = None
+
+        empty = self.empty_files.get(include=["metadatas"])
+        hashes = {file_path: meta["file_hash"] for file_path, meta in zip(empty["ids"], empty["metadatas"])}
+        hashes.update(
+            (file_path, entry["hash"] if entry["expected"] == entry["stored"] else None)
+            for file_path, entry in files.items()
+        )
+        return hashes
+
+    def record_empty_files(self, file_hashes: Dict[str, str]) -> None:
+        """
+        Records files that produced no chunks, so that get_file_hashes reports them too.
+
+        Args:
+            file_hashes (Dict[str, str]): Mapping of file path to file hash.
+        """
+        if file_hashes:
+            # ChromaDB needs an embedding per record; these records are never queried
+            self.empty_files.upsert(
+                ids=list(file_hashes),
+                metadatas=[{"file_hash": file_hash} for file_hash in file_hashes.values()],
+                embeddings=[[0.0]] * len(file_hashes)
+            )
+
+    def delete_files(self, file_paths: Iterable[str]) -> None:
+        """
+        Deletes all chunks that belong to the given files, and their empty-file records.
+
+        Args:
+            file_paths (Iterable[str]): Paths of the files to remove from the store.
+        """
+        file_paths = list(file_paths)
+        if file_paths:
+            self.collection.delete(where={"file_path": {"$in": file_paths}})
+            self.empty_files.delete(ids=file_paths)
+
     def search(self, query: str, n_results: int = 5) -> List[CodeChunk]:
         """
         Searches for the most similar code chunks and restores metadata.
@@ -81,31 +220,116 @@ class CodeBaseStore:
         Returns:
             List[CodeChunk]: List of matched code chunks with restored metadata.
         """
+        results = self._query(self._embed_query(query), n_results)
+        return results[0] if results else []
+
+    def search_many(self, queries: List[str], n_results: int = 5) -> List[List[CodeChunk]]:
+        """
+        Searches for several queries at once: one embedding batch and one ChromaDB query.
+
+        Args:
+            queries (List[str]): The search queries.
+            n_results (int): Number of results to return per query.
+
+        Returns:
+            List[List[CodeChunk]]: The matched code chunks for each query, in query order.
+        """
+        if not queries:
+            return []
+        return self._query(self.embed(list(queries)), n_results)
+
+    def _query(self, query_embeddings: List[Any], n_results: int) -> List[List[CodeChunk]]:
+        """Runs a ChromaDB query and restores the code chunks of every result list."""
         results = self.collection.query(
-            query_texts=[query],
+            query_embeddings=query_embeddings,
             n_results=n_results
         )
 
-        chunks = []
-        if results["documents"] and len(results["documents"]) > 0:
-            for i in range(len(results["documents"][0])):
-                content = results["documents"][0][i]
-                meta = results["metadatas"][0][i]
-                
-                # 1. Restore dependencies: str -> List[str]
-                if "dependencies" in meta and isinstance(meta["dependencies"], str):
-                    if meta["dependencies"]:
-                        meta["dependencies"] = meta["dependencies"].split(",")
-                    else:
-                        meta["dependencies"] = []
-                
-                # 2. Restore line_range: start/end -> Tuple[int, int]
-                if "start_line" in meta and "end_line" in meta:
-                    start = meta.pop("start_line")
-                    end = meta.pop("end_line")
-                    meta["line_range"] = (start, end)
-                
-                # parent_name if missing will be handled by ChunkMetadata default (None)
-                chunks.append(CodeChunk(content=content, metadata=ChunkMetadata(**meta)))
-        
-        return chunks
+        return [
+            [self._restore_chunk(content, meta) for content, meta in zip(contents, metas)]
+            for contents, metas in zip(results["documents"] or [], results["metadatas"] or [])
+        ]
+
+    @staticmethod
+    def _restore_chunk(content: str, meta: Dict[str, Any]) -> CodeChunk:
+        """Rebuilds a CodeChunk from a stored document and its flattened metadata."""
+        # 1. Restore dependencies: str -> List[str]
+        if "dependencies" in meta and isinstance(meta["dependencies"], str):
+            if meta["dependencies"]:
+                meta["dependencies"] = meta["dependencies"].split(",")
+            else:
+                meta["dependencies"] = []
+
+        # 2. Restore line_range: start/end -> Tuple[int, int]
+        if "start_line" in meta and "end_line" in meta:
+            start = meta.pop("start_line")
+            end = meta.pop("end_line")
+            meta["line_range"] = (start, end)
+
+        # parent_name if missing will be handled by ChunkMetadata default (None)
+        return CodeChunk(content=content, metadata=ChunkMetadata(**meta))
+
+    def lookup_answer(self, query: str) -> Optional[str]:
+        """
+        Returns the cached answer to a previous question that is close enough to this one.
+
+        Args:
+            query (str): The user's question.
+
+        Returns:
+            Optional[str]: The cached answer, or None on a cache miss.
+        """
+        if self.query_cache.count() == 0:
+            return None
+
+        results = self.query_cache.query(
+            query_embeddings=self._embed_query(query),
+            n_results=1,
+            include=["metadatas", "distances"]
+        )
+        if not results["ids"][0] or results["distances"][0][0] >= QUERY_CACHE_DISTANCE:
+            return None
+
+        # Refresh the entry's timestamp so it is evicted last
+        self.query_cache.update(ids=[results["ids"][0][0]], metadatas=[{"last_used": time.time_ns()}])
+        return results["metadatas"][0][0]["answer"]
+
+    def cache_answer(self, query: str, answer: str):
+        """
+        Stores the answer to a question, evicting the least recently used entries when full.
+
+        Args:
+            query (str): The user's question.
+            answer (str): The generated answer.
+        """
+        normalized = " ".join(query.lower().split())
+        self.query_cache.upsert(
+            ids=[hash_content(normalized.encode('utf-8'))],
+            documents=[query],
+            metadatas=[{"answer": answer, "last_used": time.time_ns()}],
+            embeddings=self._embed_query(query)
+        )
+
+        excess = self.query_cache.count() - self.query_cache_size
+        if excess > 0:
+            entries = self.query_cache.get(include=["metadatas"])
+            by_age = sorted(zip(entries["ids"], entries["metadatas"]), key=lambda e: e[1]["last_used"])
+            self.query_cache.delete(ids=[entry_id for entry_id, _ in by_age[:excess]])
+
+    def clear_query_cache(self):
+        """Drops all cached answers, e.g. after the indexed code changed."""
+        self.client.delete_collection(self.query_cache_name)
+        self.query_cache = self._open_query_cache()
+
+    def _open_query_cache(self) -> Any:
+        """Opens (or creates) the query cache collection, which compares questions by cosine distance."""
+        return self.client.get_or_create_collection(
+            name=self.query_cache_name, embedding_function=None, metadata={"hnsw:space": "cosine"}
+        )
+
+    def _embed_query(self, query: str) -> List[Any]:
+        """Embeds a query, reusing the last result since a question is looked up and then searched."""
+        if query != self._last_query:
+            self._last_query_embedding = self.embed([query])
+            self._last_query = query
+        return self._last_query_embedding
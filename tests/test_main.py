@@ -0,0 +1,67 @@
+"""
+Tests for the incremental indexing phase of main.py.
+"""
+
+import hashlib
+import src.indexer
+from main import indexing_phase
+from src.vector_store import CodeBaseStore
+
+
+def hash_embedder(texts):
+    """Deterministic stand-in for the embedding model, so the tests run offline."""
+    return [[b / 255 - 0.5 for b in hashlib.sha256(text.encode("utf-8")).digest()] for text in texts]
+
+
+def no_process_pool(*args, **kwargs):
+    raise AssertionError("nothing changed, so no process pool should be started")
+
+
+def indexed_names(store):
+    return sorted(meta["name"] for meta in store.collection.get(include=["metadatas"])["metadatas"])
+
+
+def test_indexing_phase_is_incremental(tmp_path, monkeypatch):
+    """
+    Test that re-indexing skips unchanged files, replaces changed ones, deletes removed ones,
+    remembers files without chunks, and clears the query cache whenever the indexed code changed.
+    """
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    (repo / "a.py").write_text("def alpha():\n    return 1\n\n\ndef beta():\n    return 2\n")
+    (repo / "b.py").write_text("class Gamma:\n    pass\n")
+    (repo / "c.py").write_text("def delta():\n    return 4\n")
+    (repo / "consts.py").write_text("ANSWER = 42\n")
+
+    store = CodeBaseStore(collection_name="test_indexing", persist_directory=str(tmp_path / "db"),
+                          embedder=hash_embedder)
+
+    indexing_phase(str(repo), store)
+    assert indexed_names(store) == ["Gamma", "alpha", "beta", "delta"]
+    assert set(store.get_file_hashes()) == {str(repo / name) for name in ("a.py", "b.py", "c.py", "consts.py")}
+
+    # Nothing changed: every file, including the one without chunks, is skipped without a process pool
+    store.cache_answer("What does alpha return?", "1")
+    monkeypatch.setattr(src.indexer, "ProcessPoolExecutor", no_process_pool)
+    indexing_phase(str(repo), store)
+    assert store.lookup_answer("What does alpha return?") == "1"
+    monkeypatch.undo()
+
+    # A file that drops to zero chunks still invalidates cached answers
+    (repo / "b.py").write_text("GAMMA = None\n")
+    indexing_phase(str(repo), store)
+    assert indexed_names(store) == ["alpha", "beta", "delta"]
+    assert store.lookup_answer("What does alpha return?") is None
+
+    # Changed files are replaced and removed files are deleted
+    store.cache_answer("What does alpha return?", "1")
+    (repo / "a.py").write_text("def alpha():\n    return 10\n")
+    (repo / "c.py").unlink()
+    indexing_phase(str(repo), store)
+    assert indexed_names(store) == ["alpha"]
+    assert str(repo / "c.py") not in store.get_file_hashes()
+    assert store.lookup_answer("What does alpha return?") is None
+
+    monkeypatch.setattr(src.indexer, "ProcessPoolExecutor", no_process_pool)
+    indexing_phase(str(repo), store)
+    assert indexed_names(store) == ["alpha"]
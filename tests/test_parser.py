@@ -2,6 +2,8 @@
 Unit tests for the AST parser module.
 """
 
+import ast
+from dataclasses import asdict
 import pytest
 from src.parser import ASTParser
 
@@ -51,6 +53,25 @@ class MyClass:
     assert "method_one" in m2.metadata.dependencies
 
 
+def test_dependencies_include_nested_calls():
+    """Test that enclosing definitions also collect calls made by nested ones, in source order."""
+    source = """
+class Outer:
+    @decorate()
+    def method(self):
+        def helper():
+            compute()
+        helper()
+"""
+    parser = ASTParser()
+    chunks = parser.parse_source(source, "test.py")
+
+    assert [c.metadata.name for c in chunks] == ["Outer", "method", "helper"]
+    deps = {c.metadata.name: set(c.metadata.dependencies) for c in chunks}
+    assert deps["helper"] == {"compute"}
+    assert deps["method"] == {"decorate", "helper", "compute"}
+    assert deps["Outer"] == {"decorate", "helper", "compute"}
+
 def test_async_function():
     """Test parsing an async function."""
     source = "async def fetch_data():\n    await asyncio.sleep(1)"
@@ -90,3 +111,68 @@ def outer_func():
 
     inner_method = next(c for c in chunks if c.metadata.name == "inner_method")
     assert inner_method.metadata.parent_name == "InnerClass"
+
+
+def test_parse_bytes_matches_parse_source():
+    """Test that parsing raw UTF-8 bytes gives the same chunks as parsing text."""
+    source = "class Greeter:\n    def greet(self):\n        print('你好')\n"
+    parser = ASTParser()
+
+    from_bytes = parser.parse_bytes(source.encode("utf-8"), "test.py")
+    from_text = parser.parse_source(source, "test.py")
+
+    assert from_bytes == from_text
+    assert [c.metadata.name for c in from_bytes] == ["Greeter", "greet"]
+
+
+def test_chunk_content_matches_source_segment():
+    """Test chunk content with CRLF line endings and non-ASCII text before and inside definitions."""
+    source = (
+        "GREETING = '你好'\r\n"
+        "class Greeter:\r\n"
+        "    def greet(self): return '世界'  # 注释\r\n"
+        "\r\n"
+        "    async def wave(self):\r\n"
+        "        return 'こんにちは'\r\n"
+    )
+    parser = ASTParser()
+    chunks = parser.parse_source(source, "test.py")
+
+    tree = ast.parse(source)
+    expected = {
+        node.name: ast.get_source_segment(source, node)
+        for node in ast.walk(tree)
+        if isinstance(node, (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef))
+    }
+
+    assert {c.metadata.name: c.content for c in chunks} == expected
+    assert chunks[1].content == "def greet(self): return '世界'"
+
+
+def test_tree_sitter_backend_matches_ast():
+    """Test that the tree-sitter backend extracts exactly what the ast visitor does."""
+    pytest.importorskip("tree_sitter_python")
+    source = (
+        "@register(name())\r\n"
+        "class Outer(Base, metaclass=make()):\r\n"
+        "    def method(self, x=default()):\r\n"
+        "        return (self.helper)(*build(x))  # trailing\r\n"
+        "    # comment after the body\r\n"
+        "\r\n"
+        "async def fetch():\r\n"
+        "    s = 'é'; await asyncio.sleep(1)\r\n"
+    )
+
+    def key(chunks):
+        return [(c.content, asdict(c.metadata) | {"dependencies": sorted(c.metadata.dependencies)})
+                for c in chunks]
+
+    ast_chunks = ASTParser(use_tree_sitter=False).parse_source(source, "test.py")
+    ts_parser = ASTParser()
+    assert ts_parser._tree_sitter.parse(source.encode(), "test.py") is not None
+    assert key(ts_parser.parse_source(source, "test.py")) == key(ast_chunks)
+    assert len(ast_chunks) == 3
+
+    # Input tree-sitter can't represent faithfully falls back to the ast visitor
+    assert ts_parser._tree_sitter.parse(b"type(obj).attr = 1\n", "test.py") is None
+    assert ts_parser.parse_source("def broken(:\n", "test.py") == []
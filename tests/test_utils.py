@@ -0,0 +1,62 @@
+"""
+Unit tests for the utils module.
+"""
+
+import os
+from src.utils import get_all_python_files, iter_python_files
+
+
+def test_get_all_python_files_filters(tmp_path):
+    """Test the size limits and skipped directories of get_all_python_files."""
+    files = {
+        "pkg/__init__.py": "",
+        "pkg/core.py": "def run():\n    pass\n",
+        "pkg/huge.py": "x = 1\n" * 1000,
+        "pkg/_vendor/lib.py": "def vendored():\n    pass\n",
+        "pkg/notes.txt": "def not_python():\n    pass\n",
+    }
+    for rel_path, content in files.items():
+        path = tmp_path / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+
+    # Symlinked directories are not followed, as with os.walk
+    (tmp_path / "link").symlink_to(tmp_path / "pkg", target_is_directory=True)
+
+    def found(**kwargs):
+        return sorted(os.path.relpath(p, tmp_path) for p in get_all_python_files(str(tmp_path), **kwargs))
+
+    # A dangling symlink can't be sized; with size limits it is skipped instead of raising
+    (tmp_path / "pkg" / "broken.py").symlink_to(tmp_path / "nonexistent.py")
+
+    assert found() == ["pkg/__init__.py", "pkg/_vendor/lib.py", "pkg/broken.py", "pkg/core.py", "pkg/huge.py"]
+    assert found(min_bytes=9, max_bytes=1000, skip_dirs=["_vendor"]) == ["pkg/core.py"]
+
+
+def test_iter_python_files_matches_os_walk_order(tmp_path):
+    """Test that the lazy scandir walk yields files in os.walk order."""
+    for rel_path in ["b.py", "a/z.py", "a/b/c.py", "a/a.py", "c/d.py"]:
+        path = tmp_path / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("x = 1\n")
+
+    expected = [
+        os.path.join(root, name)
+        for root, _, names in os.walk(str(tmp_path))
+        for name in names
+    ]
+    assert list(iter_python_files(str(tmp_path))) == expected
+
+
+def test_iter_python_files_dangling_symlink(tmp_path):
+    """Test that an entry that can't be stat'ed doesn't hide its siblings or subdirectories."""
+    (tmp_path / "pkg" / "sub").mkdir(parents=True)
+    (tmp_path / "pkg" / "a.py").write_text("def a():\n    pass\n")
+    (tmp_path / "pkg" / "sub" / "b.py").write_text("def b():\n    pass\n")
+    (tmp_path / "pkg" / "0broken.py").symlink_to(tmp_path / "nonexistent.py")
+
+    def found(**kwargs):
+        return sorted(os.path.relpath(p, tmp_path) for p in iter_python_files(str(tmp_path), **kwargs))
+
+    assert found() == ["pkg/0broken.py", "pkg/a.py", "pkg/sub/b.py"]
+    assert found(min_bytes=9, max_bytes=1000) == ["pkg/a.py", "pkg/sub/b.py"]
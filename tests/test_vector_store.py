@@ -5,10 +5,19 @@ Unit tests for the vector store module.
 import pytest
 import shutil
 import os
+import hashlib
 from src.vector_store import CodeBaseStore
 from src.parser import CodeChunk, ChunkMetadata
 
 
+def hash_embedder(texts):
+    """
+    Deterministic stand-in for the embedding model, so tests that don't rely on semantic
+    similarity run offline: equal texts get equal vectors, different texts near-orthogonal ones.
+    """
+    return [[b / 255 - 0.5 for b in hashlib.sha256(text.encode("utf-8")).digest()] for text in texts]
+
+
 def test_vector_store_add_and_search():
     """
     Test adding chunks to the vector store and searching for them.
@@ -73,8 +82,177 @@ def test_vector_store_add_and_search():
         assert results_add[0].metadata.name == "add"
         assert "float" in results_add[0].metadata.dependencies
         assert results_add[0].metadata.parent_name is None
+
+        # Batched search returns one result list per query, same as searching one at a time
+        batched = store.search_many(["Calculator subtract", "add a b"], n_results=1)
+        assert [[c.metadata.name for c in r] for r in batched] == [["subtract"], ["add"]]
+        assert batched[0][0].metadata.line_range == (2, 3)
+        assert store.search_many([]) == []
         
     finally:
         # Cleanup
         if os.path.exists(test_db_dir):
             shutil.rmtree(test_db_dir)
+
+
+def test_vector_store_add_chunks_in_batches():
+    """
+    Test that chunks streamed from a generator are added across several batches.
+    """
+    test_db_dir = "./test_chroma_db_batches"
+    if os.path.exists(test_db_dir):
+        shutil.rmtree(test_db_dir)
+
+    try:
+        store = CodeBaseStore(collection_name="test_batches", persist_directory=test_db_dir,
+                              embedder=hash_embedder)
+
+        chunks = (
+            CodeChunk(
+                content=f"def func_{i}():\n    return {i}",
+                metadata=ChunkMetadata(
+                    file_path="funcs.py",
+                    node_type="function",
+                    name=f"func_{i}",
+                    line_range=(i * 2 + 1, i * 2 + 2)
+                )
+            )
+            for i in range(5)
+        )
+
+        added = store.add_chunks(chunks, batch_size=2)
+
+        assert added == 5
+        assert store.collection.count() == 5
+
+        # Re-adding the same chunks overwrites them instead of duplicating or raising
+        store.add_chunks(list(store.search("func", n_results=5)))
+        assert store.collection.count() == 5
+
+    finally:
+        if os.path.exists(test_db_dir):
+            shutil.rmtree(test_db_dir)
+
+
+def test_vector_store_file_hashes_and_delete_files():
+    """
+    Test that file hashes are recorded per file and that a file's chunks can be deleted.
+    """
+    test_db_dir = "./test_chroma_db_files"
+    if os.path.exists(test_db_dir):
+        shutil.rmtree(test_db_dir)
+
+    try:
+        store = CodeBaseStore(collection_name="test_files", persist_directory=test_db_dir,
+                              embedder=hash_embedder)
+
+        chunks = [
+            CodeChunk(
+                content=f"def func_{i}():\n    return {i}",
+                metadata=ChunkMetadata(
+                    file_path=f"mod_{i % 2}.py",
+                    node_type="function",
+                    name=f"func_{i}",
+                    line_range=(i + 1, i + 2),
+                    file_hash=f"hash_{i % 2}",
+                    file_chunk_count=2
+                )
+            )
+            for i in range(4)
+        ]
+        store.add_chunks(chunks)
+
+        assert store.get_file_hashes() == {"mod_0.py": "hash_0", "mod_1.py": "hash_1"}
+
+        store.delete_files(["mod_0.py"])
+        assert store.get_file_hashes() == {"mod_1.py": "hash_1"}
+        assert store.collection.count() == 2
+
+        # file_hash is restored with the rest of the metadata (only mod_1.py is left to match)
+        assert store.search("func_1", n_results=1)[0].metadata.file_hash == "hash_1"
+
+    finally:
+        if os.path.exists(test_db_dir):
+            shutil.rmtree(test_db_dir)
+
+
+def test_vector_store_query_cache():
+    """
+    Test that answers are reused for the same question and evicted least recently used first.
+    """
+    test_db_dir = "./test_chroma_db_query_cache"
+    if os.path.exists(test_db_dir):
+        shutil.rmtree(test_db_dir)
+
+    try:
+        store = CodeBaseStore(collection_name="test_cache", persist_directory=test_db_dir,
+                              embedder=hash_embedder, query_cache_size=2)
+
+        assert store.lookup_answer("How does Session send requests?") is None
+
+        store.cache_answer("How does Session send requests?", "Through an adapter.")
+        store.cache_answer("Where are cookies stored?", "In a cookie jar.")
+        assert store.lookup_answer("How does Session send requests?") == "Through an adapter."
+        assert store.lookup_answer("Which exceptions are raised on timeout?") is None
+
+        # The cookie answer is now the least recently used one and is evicted first
+        store.cache_answer("Which exceptions are raised on timeout?", "Timeout.")
+        assert store.query_cache.count() == 2
+        assert store.lookup_answer("Where are cookies stored?") is None
+        assert store.lookup_answer("How does Session send requests?") == "Through an adapter."
+
+        store.clear_query_cache()
+        assert store.lookup_answer("How does Session send requests?") is None
+
+    finally:
+        if os.path.exists(test_db_dir):
+            shutil.rmtree(test_db_dir)
+
+
+def test_vector_store_partially_indexed_file_has_no_hash():
+    """
+    Test that a file whose chunks were only partly stored (e.g. an interrupted run) is
+    reported without a hash, so the next indexing run parses it again.
+    """
+    test_db_dir = "./test_chroma_db_partial"
+    if os.path.exists(test_db_dir):
+        shutil.rmtree(test_db_dir)
+
+    try:
+        calls = []
+
+        def flaky_embedder(texts):
+            calls.append(len(texts))
+            if len(calls) == 2:
+                raise RuntimeError("embedding service unavailable")
+            return [[float(len(t)), 1.0, 0.0] for t in texts]
+
+        store = CodeBaseStore(collection_name="test_partial", persist_directory=test_db_dir,
+                              embedder=flaky_embedder)
+
+        def file_chunks(file_path, count):
+            return [
+                CodeChunk(
+                    content=f"def func_{i}():\n    return {i}",
+                    metadata=ChunkMetadata(
+                        file_path=file_path,
+                        node_type="function",
+                        name=f"func_{i}",
+                        line_range=(i + 1, i + 2),
+                        file_hash="hash",
+                        file_chunk_count=count
+                    )
+                )
+                for i in range(count)
+            ]
+
+        # The second batch fails after big.py's first three chunks were stored
+        with pytest.raises(RuntimeError):
+            store.add_chunks(file_chunks("small.py", 1) + file_chunks("big.py", 5), batch_size=4)
+
+        assert store.collection.count() == 4
+        assert store.get_file_hashes() == {"small.py": "hash", "big.py": None}
+
+    finally:
+        if os.path.exists(test_db_dir):
+            shutil.rmtree(test_db_dir)